@@ -1,303 +1,634 @@
 import streamlit as st
 import pandas as pd
+import functools
 import io
-import matplotlib.pyplot as plt
-import seaborn as sns
+import os
+import multiprocessing
+import numpy as np
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 from pptx import Presentation
 from pptx.util import Inches
 
-# Set a professional style for matplotlib plots
-plt.style.use('seaborn-v0_8-darkgrid') # Using a darkgrid style for a clean look
-sns.set_palette("viridis") # A colorblind-friendly and aesthetically pleasing palette
+import charts
+from charts import render_chart
+from column_stats import COUNT, MAX, MEAN, MIN, M2, column_moments
+
+# Size of the blocks Arrow reads; column types are inferred from the first one
+CSV_BLOCK_SIZE = 8 << 20
+# Uploads with more rows than this are reservoir-sampled down to it for plotting
+MAX_PLOT_ROWS = 200_000
+# Stop counting the values of a column once it has more distinct values than this
+MAX_TRACKED_UNIQUES = 10_000
+# Fewer charts than this render faster in-process than they can be handed to worker processes
+MIN_CHARTS_FOR_POOL = 8
+# Number of bins in the numeric distribution charts
+HISTOGRAM_BINS = 50
+
+# Headers for the per-column table in the dataset overview
+SUMMARY_COLUMNS = {
+    'type': 'Type',
+    'min': 'Min',
+    'max': 'Max',
+    'mean': 'Mean',
+    'median': 'Median',
+    'std': 'Std Dev',
+    'count': 'Non-null',
+    'unique_values': 'Unique',
+    'missing_count': 'Missing'
+}
+
+# Running statistics for every column, updated one RecordBatch at a time. Each field is
+# an array indexed by column position so batches are merged with whole-array operations.
+def _new_accumulators(num_cols):
+    return {
+        'non_null': np.zeros(num_cols, dtype=np.int64),
+        'missing': np.zeros(num_cols, dtype=np.int64),
+        'numeric_count': np.zeros(num_cols),
+        'mean': np.zeros(num_cols),
+        'm2': np.zeros(num_cols), # Sum of squared deviations from the mean (Welford)
+        'min': np.full(num_cols, np.inf),
+        'max': np.full(num_cols, -np.inf),
+        'counts': [pd.Series(dtype=np.int64) for _ in range(num_cols)], # Value -> frequency
+        'counts_capped': np.zeros(num_cols, dtype=bool)
+    }
+
+def _is_text_dtype(dtype):
+    return not pd.api.types.is_numeric_dtype(dtype) and (
+        pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+    )
+
+def _update_accumulators(acc, df_chunk):
+    # One vectorized isna pass gives the missing counts of every column; the non-null
+    # counts follow from them instead of a second sweep with count()
+    missing = df_chunk.isna().sum().to_numpy()
+    acc['missing'] += missing
+    acc['non_null'] += len(df_chunk) - missing
+
+    # Columns Arrow already typed as numeric need no probing; only text columns (object, or
+    # the str dtype Arrow strings become on pandas >= 3) are coerced, anything else
+    # (e.g. timestamps) is never numeric
+    dtypes = df_chunk.dtypes
+    numeric_idx = np.flatnonzero([pd.api.types.is_numeric_dtype(dtype) for dtype in dtypes])
+    text_idx = np.flatnonzero([_is_text_dtype(dtype) for dtype in dtypes])
+    numeric_parts = [df_chunk.iloc[:, numeric_idx].astype(np.float64)]
+    if text_idx.size:
+        numeric_parts.append(df_chunk.iloc[:, text_idx].apply(pd.to_numeric, errors='coerce'))
+    numeric_block = pd.concat(numeric_parts, axis=1)
+    block_idx = np.concatenate([numeric_idx, text_idx])
+
+    # count/mean/m2/min/max for every numeric(-looking) column in one JIT-compiled pass
+    if block_idx.size:
+        values = np.asfortranarray(numeric_block.to_numpy(dtype=np.float64, na_value=np.nan))
+        moments = column_moments(values)
+        has_values = moments[:, COUNT] > 0
+        idx = block_idx[has_values]
+        moments = moments[has_values]
+
+        # Merge the batch moments into the running ones (Chan et al. parallel Welford)
+        batch_count = moments[:, COUNT]
+        prev_count = acc['numeric_count'][idx]
+        total = prev_count + batch_count
+        delta = moments[:, MEAN] - acc['mean'][idx]
+        acc['mean'][idx] += delta * batch_count / total
+        acc['m2'][idx] += moments[:, M2] + delta ** 2 * prev_count * batch_count / total
+        acc['numeric_count'][idx] = total
+        acc['min'][idx] = np.minimum(acc['min'][idx], moments[:, MIN])
+        acc['max'][idx] = np.maximum(acc['max'][idx], moments[:, MAX])
+
+    # Numeric-typed columns never end up categorical, so only count values of the rest
+    is_numeric = np.zeros(len(dtypes), dtype=bool)
+    is_numeric[numeric_idx] = True
+    for i in np.flatnonzero(~is_numeric & ~acc['counts_capped']):
+        # Merge as pandas Series so unique values never become Python dict keys
+        batch_counts = df_chunk.iloc[:, i].value_counts()
+        counts = acc['counts'][i].add(batch_counts, fill_value=0).astype(np.int64)
+        if len(counts) > MAX_TRACKED_UNIQUES:
+            acc['counts_capped'][i] = True
+            counts = counts.iloc[:0]
+        acc['counts'][i] = counts
+
+def _reservoir_update(sample, chunk, rows_seen, rng):
+    """
+    Folds a chunk into a fixed-size uniform sample of all rows seen so far (Algorithm R).
+
+    Args:
+        sample: The current sample DataFrame.
+        chunk: The incoming chunk of rows.
+        rows_seen: Number of rows of the stream before this chunk.
+        rng: A numpy random Generator.
+
+    Returns:
+        The updated sample DataFrame.
+    """
+    sample_size = len(sample)
+    positions = np.arange(rows_seen, rows_seen + len(chunk))
+    slots = rng.integers(0, positions + 1)
+    hits = np.flatnonzero(slots < sample_size)
+    if hits.size == 0:
+        return sample
+
+    # When a slot is hit more than once, the later row wins, as in the sequential algorithm
+    hit_slots = slots[hits]
+    _, last_from_end = np.unique(hit_slots[::-1], return_index=True)
+    last = hits.size - 1 - last_from_end
+    keep = np.ones(sample_size, dtype=bool)
+    keep[hit_slots[last]] = False
+    return pd.concat([sample[keep], chunk.iloc[hits[last]]], ignore_index=True)
+
+def _dedupe_column_names(names):
+    """
+    Renames blank and repeated header names the way pd.read_csv does ('Unnamed: 2', 'a.1').
+
+    Arrow keeps them as they are, but the analysis keys columns by name.
+
+    Args:
+        names: The header names as Arrow read them.
+
+    Returns:
+        A list of unique column names.
+    """
+    names = [name if name else f"Unnamed: {i}" for i, name in enumerate(names)]
+    counts = {}
+    for i, name in enumerate(names):
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = f"{name}.{count}"
+            count = counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+def _open_csv(csv_file, column_names=None, column_types=None):
+    csv_file.seek(0)
+    return pa_csv.open_csv(
+        csv_file,
+        # Given explicit names, the header row is skipped rather than read as names
+        read_options=pa_csv.ReadOptions(
+            use_threads=True,
+            block_size=CSV_BLOCK_SIZE,
+            column_names=column_names,
+            skip_rows=1 if column_names else 0,
+        ),
+        # Quoted fields may span lines, as pd.read_csv allows
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True, column_types=column_types),
+    )
+
+def _stream_batches(reader):
+    """
+    Folds every RecordBatch of a CSV reader into the running statistics.
+
+    Args:
+        reader: A pyarrow CSVStreamingReader.
+
+    Returns:
+        A (accumulators, row count, chunks, sample) tuple. chunks holds the whole file when it
+        fits in MAX_PLOT_ROWS; otherwise it is empty and sample is a uniform sample of that size.
+    """
+    acc = _new_accumulators(len(reader.schema.names))
+    rng = np.random.default_rng(0)
+
+    num_rows = 0
+    chunks = [] # Kept whole until the file outgrows MAX_PLOT_ROWS
+    sample = None
+    for batch in reader:
+        df_chunk = batch.to_pandas(split_blocks=True, self_destruct=True)
+        _update_accumulators(acc, df_chunk)
+
+        if sample is None and num_rows + len(df_chunk) <= MAX_PLOT_ROWS:
+            chunks.append(df_chunk)
+        else:
+            if sample is None:
+                head_rows = MAX_PLOT_ROWS - num_rows
+                chunks.append(df_chunk.iloc[:head_rows])
+                sample = pd.concat(chunks, ignore_index=True)
+                chunks = []
+                sample = _reservoir_update(sample, df_chunk.iloc[head_rows:], MAX_PLOT_ROWS, rng)
+            else:
+                sample = _reservoir_update(sample, df_chunk, num_rows, rng)
+        num_rows += len(df_chunk)
+    return acc, num_rows, chunks, sample
 
 # Function to analyze CSV content and generate summary
-def analyze_csv_data(csv_content: str):
+def analyze_csv_data(csv_file):
     """
     Analyzes CSV content and generates a summary.
 
+    The file is streamed through Arrow one RecordBatch at a time, so peak memory
+    stays proportional to the batch size rather than the file size. Statistics are
+    accumulated incrementally; only a (possibly sampled) DataFrame is kept for plotting.
+
     Args:
-        csv_content: A string containing the CSV data.
+        csv_file: A seekable binary file-like object containing the CSV data.
 
     Returns:
-        A dictionary containing the dataset summary, column information, and the DataFrame.
+        A dictionary containing the dataset summary, a per-column statistics frame,
+        the value counts of plottable categorical columns, the (density, bin edges) histogram
+        of each numeric column, and the DataFrame.
     """
     try:
-        # Read CSV content into a pandas DataFrame
-        df = pd.read_csv(io.StringIO(csv_content))
+        reader = _open_csv(csv_file)
+        header = reader.schema.names
+        deduped_names = _dedupe_column_names(header)
+        column_names = deduped_names if deduped_names != header else None
+
+        # Arrow infers the column types from the first block only, so a later value that doesn't
+        # fit (a float or text in an integer column, data in a column that started out empty)
+        # fails the read. Rather than parse Arrow's error text, each retry widens more columns:
+        # first integers to float64 and still-empty columns to strings, the common cases; then
+        # every column to strings, which the to_numeric probe classifies as pd.read_csv would.
+        names = column_names or header
+        widened_types = {
+            name: pa.float64() if pa.types.is_integer(field.type) else pa.string()
+            for name, field in zip(names, reader.schema)
+            if pa.types.is_integer(field.type) or pa.types.is_null(field.type)
+        }
+        string_types = {name: pa.string() for name in names}
+        attempts = [{}]
+        if widened_types and widened_types != string_types:
+            attempts.append(widened_types)
+        attempts.append(string_types)
+
+        for attempt, column_types in enumerate(attempts):
+            if attempt or column_names is not None:
+                reader = _open_csv(csv_file, column_names, column_types)
+            try:
+                acc, num_rows, chunks, sample = _stream_batches(reader)
+                break
+            except pa.ArrowInvalid:
+                if attempt == len(attempts) - 1:
+                    raise
+        column_names = reader.schema.names
     except Exception as e:
         return {"error": f"Failed to parse CSV: {e}"}
 
-    num_rows, num_cols = df.shape
-    missing_values_count = df.isnull().sum().sum()
+    is_sampled = sample is not None
+    if not is_sampled:
+        if chunks:
+            df = pd.concat(chunks, ignore_index=True)
+        else:
+            df = reader.schema.empty_table().to_pandas()
+    else:
+        df = sample
+
+    num_cols = len(column_names)
+    missing_values_count = int(acc['missing'].sum())
     total_cells = num_rows * num_cols
     missing_percentage = (missing_values_count / total_cells * 100) if total_cells > 0 else 0
 
-    column_info = {}
+    # Determine which columns are primarily numeric
+    # A column is considered numeric if more than 80% of its non-missing values are numeric
+    numeric_count = acc['numeric_count']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        is_numeric = (numeric_count > 0) & (numeric_count / acc['non_null'] > 0.8)
+        std = np.sqrt(acc['m2'] / (numeric_count - 1))
+    std[numeric_count < 2] = np.nan
+
+    # Categorical columns only need their unique-value count; counts are kept for the
+    # few-valued ones that get plotted
+    unique_values = np.array([len(counts) for counts in acc['counts']], dtype=np.int64)
+    unique_values[acc['counts_capped']] = MAX_TRACKED_UNIQUES
+    categorical_counts = {
+        col_name: acc['counts'][i].sort_values(ascending=False).head(50) # Ordered by frequency
+        for i, col_name in enumerate(column_names)
+        if not is_numeric[i] and unique_values[i] < 50
+    }
+
+    # One row per column, as a frame, so consumers work on whole columns of statistics
+    stats_frame = pd.DataFrame({
+        'type': np.where(is_numeric, 'numeric', 'categorical'),
+        'min': np.where(is_numeric, acc['min'], np.nan),
+        'max': np.where(is_numeric, acc['max'], np.nan),
+        'mean': np.where(is_numeric, acc['mean'], np.nan),
+        'median': np.nan, # Filled in below from the plotting frame
+        'std': np.where(is_numeric, std, np.nan),
+        # Integer columns with <NA> where the statistic doesn't apply to the column's type
+        'count': pd.arrays.IntegerArray(numeric_count.astype(np.int64), ~is_numeric), # Non-null numeric values
+        'unique_values': pd.arrays.IntegerArray(unique_values, is_numeric),
+        'unique_values_capped': acc['counts_capped'] & ~is_numeric, # unique_values is a lower bound
+        'missing_count': acc['missing']
+    }, index=pd.Index(column_names, name='column'))
+
+    # The median can't be streamed, so take it from the plotting frame (exact unless sampled),
+    # for all numeric columns in one aggregation
+    histograms = {}
+    if is_numeric.any():
+        # Only text columns need the coerce probe; numeric dtypes are passed through as-is
+        numeric_frame = df.iloc[:, np.flatnonzero(is_numeric)].apply(
+            lambda col_data: col_data if pd.api.types.is_numeric_dtype(col_data.dtype) else pd.to_numeric(col_data, errors='coerce')
+        )
+        stats_frame.loc[is_numeric, 'median'] = numeric_frame.median().to_numpy()
+
+        # Histogram bins are computed here, once per upload, so reruns and the chart workers
+        # only ever handle the bin counts rather than the raw values
+        for col_name, col_data in numeric_frame.items():
+            values = col_data.to_numpy(dtype=np.float64)
+            # Drop NaN and ±inf ("inf"/"Infinity" parse as numbers), which np.histogram can't bin
+            values = values[np.isfinite(values)]
+            if values.size:
+                histograms[col_name] = np.histogram(values, bins=HISTOGRAM_BINS, density=True)
+
+    # to_string renders pd.NA as <NA> whatever na_rep or formatters say, so the integer
+    # columns are given their display text here, with capped unique counts marked '>'
+    summary_table = stats_frame.drop(columns='unique_values_capped').astype({'count': object, 'unique_values': object})
+    summary_table['count'] = summary_table['count'].where(is_numeric, '-')
+    summary_table['unique_values'] = (
+        summary_table['unique_values']
+        .where(~is_numeric, '-')
+        .mask(stats_frame['unique_values_capped'], f">{MAX_TRACKED_UNIQUES}")
+    )
+
+    # Generate summary text; the column table is formatted in one to_string call
+    summary_parts = [
+        f"The dataset contains {num_rows} rows and {num_cols} columns.\n",
+        f"Total missing values across the dataset: {missing_values_count} ({missing_percentage:.2f}% of all cells).\n\n",
+        "Column Details:\n",
+        summary_table.rename(columns=SUMMARY_COLUMNS).to_string(float_format='%.2f', na_rep='-'),
+        "\n"
+    ]
+    if is_sampled:
+        summary_parts.append(f"Medians are estimated from a random sample of {len(df)} rows; all other statistics cover every row.\n")
+    summary = "".join(summary_parts)
 
-    # Analyze each column
-    for col_name in df.columns:
-        col_data = df[col_name]
-        
-        # Attempt to convert to numeric, coercing errors to NaN
-        numeric_col_data = pd.to_numeric(col_data, errors='coerce').dropna()
-        
-        # Count missing values for the current column
-        col_missing_count = col_data.isnull().sum()
-
-        # Determine if the column is primarily numeric
-        # A column is considered numeric if more than 80% of its non-missing values are numeric
-        if not numeric_col_data.empty and len(numeric_col_data) / (len(col_data) - col_missing_count) > 0.8:
-            column_info[col_name] = {
-                'type': 'numeric',
-                'min': numeric_col_data.min(),
-                'max': numeric_col_data.max(),
-                'mean': numeric_col_data.mean(),
-                'median': numeric_col_data.median(), # Added median for better central tendency
-                'std': numeric_col_data.std(),
-                'count': len(numeric_col_data), # Count of non-null numeric values
-                'missing_count': col_missing_count
-            }
-        else:
-            # Treat as categorical
-            counts = col_data.value_counts().to_dict()
-            column_info[col_name] = {
-                'type': 'categorical',
-                'unique_values': len(counts),
-                'counts': counts,
-                'missing_count': col_missing_count
-            }
-
-    # Generate summary text
-    summary = f"The dataset contains {num_rows} rows and {num_cols} columns.\n"
-    summary += f"Total missing values across the dataset: {missing_values_count} ({missing_percentage:.2f}% of all cells).\n\n"
-    summary += "Column Details:\n"
-    for col_name, info in column_info.items():
-        summary += f"- **{col_name}**: "
-        if info['type'] == 'numeric':
-            summary += f"Numeric (Min: {info['min']:.2f}, Max: {info['max']:.2f}, Mean: {info['mean']:.2f}, Median: {info['median']:.2f}, Std Dev: {info['std']:.2f}, Non-null: {info['count']}). Missing: {info['missing_count']} values.\n"
-        else:
-            summary += f"Categorical ({info['unique_values']} unique values). Missing: {info['missing_count']} values.\n"
-    
     return {
         "summary": summary,
-        "column_info": column_info,
-        "dataframe": df # Return the DataFrame for plotting
+        "column_info": stats_frame,
+        "categorical_counts": categorical_counts,
+        "histograms": histograms,
+        "dataframe": df, # Return the DataFrame for plotting
+        "is_sampled": is_sampled
     }
 
-# --- Streamlit App ---
-st.set_page_config(layout="wide", page_title="Dataset Analyzer")
-
-st.title("📊 Dataset Analyzer")
-st.markdown("Upload your CSV file to get an automated overview and visualizations.")
+# Streamlit reruns the whole script on every widget interaction; caching on the uploaded
+# bytes (which Streamlit hashes directly) keeps reruns from re-parsing the same file
+@st.cache_data(show_spinner=False, max_entries=8)
+def _analyze(csv_bytes: bytes):
+    return analyze_csv_data(io.BytesIO(csv_bytes))
 
-uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
+@st.cache_resource(show_spinner=False)
+def _chart_pool():
+    """
+    Starts the chart worker processes once and keeps them for the life of the server.
+
+    Workers are never forked from the multi-threaded Streamlit server: they come from a
+    forkserver where the platform has one, and are spawned otherwise. Either way each new
+    worker imports this script as __mp_main__, which only runs its module level; the app
+    itself is behind the __name__ == "__main__" guard at the bottom. That holds for the
+    replacement workers Pool starts whenever one dies, too, and charts.init_worker gives
+    each of them its Figure.
+    """
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    mp_context = multiprocessing.get_context(start_method)
+    return mp_context.Pool(processes=os.cpu_count() or 1, initializer=charts.init_worker)
 
-if uploaded_file is not None:
-    # Read the uploaded file
-    csv_content = uploaded_file.getvalue().decode("utf-8")
+@st.cache_data(show_spinner=False, max_entries=8)
+def _render_charts(chart_tasks):
+    """
+    Renders every chart, in parallel worker processes when there are enough of them.
 
-    with st.spinner("Analyzing dataset and generating visualizations..."):
-        analysis_results = analyze_csv_data(csv_content)
+    Args:
+        chart_tasks: A list of (kind, col_name, payload) tuples, as taken by charts.render_chart.
 
-    if "error" in analysis_results:
-        st.error(f"Error: {analysis_results['error']}")
-    else:
-        st.subheader("Dataset Overview")
-        st.text(analysis_results["summary"]) # st.text preserves formatting
+    Returns:
+        A list of (chart title, PNG bytes) tuples, in the same order as chart_tasks.
+    """
+    if len(chart_tasks) < MIN_CHARTS_FOR_POOL:
+        return [render_chart(*task) for task in chart_tasks]
+    return _chart_pool().starmap(render_chart, chart_tasks)
+
+# Download payloads; passed to st.download_button as callables so they are only built on click
+def _to_csv_bytes(df):
+    # Write straight into a bytes buffer instead of building an intermediate str
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, encoding='utf-8')
+    return buf.getvalue()
+
+def _to_parquet_bytes(df):
+    buf = io.BytesIO()
+    df.to_parquet(buf, engine='pyarrow', compression='zstd', index=False)
+    return buf.getvalue()
 
-        st.subheader("Visualizations")
-        df = analysis_results["dataframe"]
-        column_info = analysis_results["column_info"]
+# --- Streamlit App ---
+def main():
+    st.set_page_config(layout="wide", page_title="Dataset Analyzer")
 
-        # List to store chart images for PPT
-        chart_images_for_ppt = []
+    st.title("📊 Dataset Analyzer")
+    st.markdown("Upload your CSV file to get an automated overview and visualizations.")
 
-        # Use Streamlit columns for better chart layout
-        chart_cols = st.columns(2) # Create two columns for charts
+    uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
 
-        num_charts_displayed = 0
-        chart_idx = 0
+    if uploaded_file is not None:
+        with st.spinner("Analyzing dataset and generating visualizations..."):
+            # Hand the raw bytes to Arrow instead of decoding them to a string
+            analysis_results = _analyze(uploaded_file.getvalue())
 
-        for col_name, info in column_info.items():
-            # Use the current column for placing the chart
-            with chart_cols[chart_idx % 2]:
-                if info['type'] == 'categorical' and info['unique_values'] < 50:
-                    chart_title = f'Frequency Distribution of {col_name}'
+        if "error" in analysis_results:
+            st.error(f"Error: {analysis_results['error']}")
+        else:
+            st.subheader("Dataset Overview")
+            st.text(analysis_results["summary"]) # st.text preserves formatting
+
+            st.subheader("Visualizations")
+            df = analysis_results["dataframe"]
+            column_info = analysis_results["column_info"]
+            categorical_counts = analysis_results["categorical_counts"]
+            histograms = analysis_results["histograms"]
+            if analysis_results["is_sampled"]:
+                st.caption(f"Charts and medians are drawn from a random sample of {len(df)} rows; the other overview statistics cover the full dataset.")
+
+            # List to store chart images for PPT
+            chart_images_for_ppt = []
+
+            # Use Streamlit columns for better chart layout
+            chart_cols = st.columns(2) # Create two columns for charts
+
+            # Collect every chart first so they can all be rendered in parallel
+            chart_tasks = []
+            chart_layout = [] # In display order: an index into chart_tasks, or a message for a skipped column
+            for col_name, col_type, count in zip(column_info.index, column_info['type'], column_info['count']):
+                if col_name in categorical_counts:
+                    # Counts are already ordered by frequency for better readability
+                    chart_layout.append(len(chart_tasks))
+                    chart_tasks.append(('categorical', col_name, categorical_counts[col_name]))
+                elif col_type == 'numeric':
+                    if count > 10 and col_name in histograms: # Only plot if sufficient data points
+                        chart_layout.append(len(chart_tasks))
+                        chart_tasks.append(('numeric', col_name, histograms[col_name]))
+                    else:
+                        chart_layout.append(f"Not enough data points to plot distribution for '{col_name}' in this column.")
+
+            chart_results = _render_charts(chart_tasks)
+            num_charts_displayed = len(chart_results)
+
+            chart_idx = 0
+            for item in chart_layout:
+                # Use the current column for placing the chart
+                with chart_cols[chart_idx % 2]:
+                    if isinstance(item, str):
+                        st.info(item)
+                        continue
+                    chart_title, png = chart_results[item]
                     st.write(f"#### {chart_title}")
-                    # Order categorical bars by frequency for better readability
-                    ordered_counts = pd.Series(info['counts']).sort_values(ascending=False)
-                    
-                    fig, ax = plt.subplots(figsize=(8, 5)) # Set a consistent figure size
-                    sns.barplot(x=ordered_counts.index, y=ordered_counts.values, ax=ax, palette="viridis")
-                    ax.set_title(chart_title, fontsize=14)
-                    ax.set_xlabel(col_name, fontsize=12)
-                    ax.set_ylabel('Count', fontsize=12)
-                    plt.xticks(rotation=45, ha='right') # Rotate labels for readability
-                    plt.tight_layout() # Adjust layout to prevent labels from overlapping
-                    st.pyplot(fig)
-                    
-                    # Save chart to BytesIO for PPT
-                    buf = io.BytesIO()
-                    fig.savefig(buf, format="png", bbox_inches='tight')
-                    buf.seek(0)
-                    chart_images_for_ppt.append({"title": chart_title, "image_buffer": buf})
-                    plt.close(fig) # Close the figure to free memory
-                    num_charts_displayed += 1
+                    st.image(png)
+
+                    # Keep a reference to the cached PNG bytes for the PPT rather than a buffer copy
+                    chart_images_for_ppt.append({"title": chart_title, "png": png})
                     chart_idx += 1
-                elif info['type'] == 'numeric':
-                    if info['count'] > 10: # Only plot if sufficient data points
-                        chart_title = f'Distribution of {col_name}'
-                        st.write(f"#### {chart_title}")
-                        fig, ax = plt.subplots(figsize=(8, 5)) # Set a consistent figure size
-                        sns.histplot(df[col_name].dropna(), kde=True, ax=ax, palette="viridis")
-                        ax.set_title(chart_title, fontsize=14)
-                        ax.set_xlabel(col_name, fontsize=12)
-                        ax.set_ylabel('Density / Count', fontsize=12)
-                        plt.tight_layout()
-                        st.pyplot(fig)
-
-                        # Save chart to BytesIO for PPT
-                        buf = io.BytesIO()
-                        fig.savefig(buf, format="png", bbox_inches='tight')
-                        buf.seek(0)
-                        chart_images_for_ppt.append({"title": chart_title, "image_buffer": buf})
-                        plt.close(fig) # Close the figure to free memory
-                        num_charts_displayed += 1
-                        chart_idx += 1
-                    else:
-                        st.info(f"Not enough data points to plot distribution for '{col_name}' in this column.")
 
-        if num_charts_displayed == 0:
-            st.info("No suitable columns found for automatic chart generation (e.g., all columns are text, too many unique values, or insufficient numeric data).")
+            if num_charts_displayed == 0:
+                st.info("No suitable columns found for automatic chart generation (e.g., all columns are text, too many unique values, or insufficient numeric data).")
 
-        st.subheader("Download Section")
-        st.markdown("You can download the analyzed dataset or a summary of the analysis for your records.")
+            st.subheader("Download Section")
+            st.markdown("You can download the analyzed dataset or a summary of the analysis for your records.")
         
-        # Download original DataFrame as CSV
-        csv_download = df.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="Download Analyzed Data (CSV)",
-            data=csv_download,
-            file_name="analyzed_data.csv",
-            mime="text/csv",
-            help="Download the full dataset you uploaded, as processed by the analyzer."
-        )
-
-        # Download summary text
-        summary_download_text = analysis_results["summary"]
-        st.download_button(
-            label="Download Dataset Overview (Text)",
-            data=summary_download_text,
-            file_name="dataset_overview.txt",
-            mime="text/plain",
-            help="Download the textual summary of the dataset's characteristics."
-        )
-
-        # --- PowerPoint Generation and Download ---
-        st.subheader("Generate Presentation (PPT)")
-        if chart_images_for_ppt:
-            if st.button("Generate and Download PPT"):
-                prs = Presentation()
-                # Use a blank slide layout (layout index 6 is typically blank)
-                blank_slide_layout = prs.slide_layouts[6] 
-
-                # Add a title slide
-                title_slide_layout = prs.slide_layouts[0] # Title slide layout
-                slide = prs.slides.add_slide(title_slide_layout)
-                title = slide.shapes.title
-                subtitle = slide.placeholders[1]
-                title.text = "Dataset Analysis Report"
-                subtitle.text = "Generated by Streamlit Analyzer"
-
-                # Add slides for each chart
-                for chart_data in chart_images_for_ppt:
-                    slide = prs.slides.add_slide(blank_slide_layout)
-                    # Add title to the slide
-                    left = top = width = height = Inches(0.5) # Placeholder values
-                    title_shape = slide.shapes.add_textbox(left, top, prs.slide_width - Inches(1), Inches(0.75))
-                    tf = title_shape.text_frame
-                    tf.text = chart_data["title"]
-                    tf.paragraphs[0].font.size = Inches(0.25) # Adjust font size if needed
-
-                    # Calculate position to center the image
-                    img_width = Inches(8)
-                    img_height = Inches(5)
-                    left = (prs.slide_width - img_width) / 2
-                    top = (prs.slide_height - img_height) / 2 + Inches(0.5) # Adjust for title
-
-                    slide.shapes.add_picture(chart_data["image_buffer"], left, top, img_width, img_height)
-
-                # Save presentation to a BytesIO object
-                ppt_buffer = io.BytesIO()
-                prs.save(ppt_buffer)
-                ppt_buffer.seek(0)
-
+            # Download original DataFrame as CSV; a sampled frame isn't the full dataset,
+            # so serve the uploaded bytes in that case. Either way nothing is serialized
+            # until the button is clicked.
+            if analysis_results["is_sampled"]:
+                csv_download = uploaded_file.getvalue
+            else:
+                csv_download = functools.partial(_to_csv_bytes, df)
+            st.download_button(
+                label="Download Analyzed Data (CSV)",
+                data=csv_download,
+                file_name="analyzed_data.csv",
+                mime="text/csv",
+                help="Download the full dataset you uploaded, as processed by the analyzer."
+            )
+
+            # Parquet is much smaller and faster to write, but only the full frame can be offered
+            if not analysis_results["is_sampled"]:
                 st.download_button(
-                    label="Click to Download PPT",
-                    data=ppt_buffer,
-                    file_name="dataset_analysis_report.pptx",
-                    mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-                    help="Download a PowerPoint presentation with all generated charts."
+                    label="Download Analyzed Data (Parquet)",
+                    data=functools.partial(_to_parquet_bytes, df),
+                    file_name="analyzed_data.parquet",
+                    mime="application/vnd.apache.parquet",
+                    help="Download the full dataset as a zstd-compressed Parquet file."
                 )
-                st.success("PPT generated successfully!")
-        else:
-            st.info("Upload a dataset to generate charts and the PPT.")
-
 
-        st.subheader("Context: Leveraging Data for Organizational Development")
-        st.markdown("""
-        After analyzing the charts and dataset overview, here's how you can translate these insights into actionable strategies for your organization:
-
-        **1. Identify Trends and Patterns:**
-        * **Categorical Distributions:** Look at bar charts for categorical data (e.g., 'City', 'Occupation'). Are there dominant categories? Are there unexpected distributions? This can inform resource allocation, targeted marketing, or identifying underserved segments. For instance, a high concentration in one city might suggest a need for more localized support or expansion opportunities elsewhere.
-        * **Numeric Distributions:** Histograms and summary statistics for numeric data (e.g., 'Age', 'Salary', 'Experience') reveal the spread and central tendencies. Are salaries clustered around a certain range? Is age distribution skewed? This can help in workforce planning, compensation strategies, or identifying training needs.
-
-        **2. Spot Anomalies and Outliers:**
-        * Unusual spikes or dips in charts, or extreme min/max values in numeric summaries, could indicate data entry errors, rare events, or critical issues. Investigating these can uncover fraud, system glitches, or unique business opportunities.
-
-        **3. Assess Data Quality:**
-        * The "Missing values" count is crucial. High percentages of missing data in key columns can impact the reliability of your analysis. Consider strategies for data imputation or collecting more complete data.
-
-        **4. Formulate Hypotheses:**
-        * Based on visual patterns, start asking "why" questions. Why is one category so much larger than others? Why is there a bimodal distribution in a numeric column? These hypotheses can guide further, more targeted analysis.
+            # Download summary text
+            summary_download_text = analysis_results["summary"]
+            st.download_button(
+                label="Download Dataset Overview (Text)",
+                data=summary_download_text,
+                file_name="dataset_overview.txt",
+                mime="text/plain",
+                help="Download the textual summary of the dataset's characteristics."
+            )
+
+            # --- PowerPoint Generation and Download ---
+            st.subheader("Generate Presentation (PPT)")
+            if chart_images_for_ppt:
+                if st.button("Generate and Download PPT"):
+                    prs = Presentation()
+                    # Use a blank slide layout (layout index 6 is typically blank)
+                    blank_slide_layout = prs.slide_layouts[6] 
+
+                    # Add a title slide
+                    title_slide_layout = prs.slide_layouts[0] # Title slide layout
+                    slide = prs.slides.add_slide(title_slide_layout)
+                    title = slide.shapes.title
+                    subtitle = slide.placeholders[1]
+                    title.text = "Dataset Analysis Report"
+                    subtitle.text = "Generated by Streamlit Analyzer"
+
+                    # Add slides for each chart
+                    for chart_data in chart_images_for_ppt:
+                        slide = prs.slides.add_slide(blank_slide_layout)
+                        # Add title to the slide
+                        left = top = width = height = Inches(0.5) # Placeholder values
+                        title_shape = slide.shapes.add_textbox(left, top, prs.slide_width - Inches(1), Inches(0.75))
+                        tf = title_shape.text_frame
+                        tf.text = chart_data["title"]
+                        tf.paragraphs[0].font.size = Inches(0.25) # Adjust font size if needed
+
+                        # Calculate position to center the image
+                        img_width = Inches(8)
+                        img_height = Inches(5)
+                        left = (prs.slide_width - img_width) / 2
+                        top = (prs.slide_height - img_height) / 2 + Inches(0.5) # Adjust for title
+
+                        # A short-lived view over the cached bytes; closed as soon as pptx has copied it
+                        with io.BytesIO(chart_data["png"]) as image_stream:
+                            slide.shapes.add_picture(image_stream, left, top, width=img_width, height=img_height)
+
+                    # Save presentation to a BytesIO object
+                    ppt_buffer = io.BytesIO()
+                    prs.save(ppt_buffer)
+                    ppt_buffer.seek(0)
+
+                    st.download_button(
+                        label="Click to Download PPT",
+                        data=ppt_buffer,
+                        file_name="dataset_analysis_report.pptx",
+                        mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+                        help="Download a PowerPoint presentation with all generated charts."
+                    )
+                    st.success("PPT generated successfully!")
+            else:
+                st.info("Upload a dataset to generate charts and the PPT.")
+
+
+            st.subheader("Context: Leveraging Data for Organizational Development")
+            st.markdown("""
+            After analyzing the charts and dataset overview, here's how you can translate these insights into actionable strategies for your organization:
+
+            **1. Identify Trends and Patterns:**
+            * **Categorical Distributions:** Look at bar charts for categorical data (e.g., 'City', 'Occupation'). Are there dominant categories? Are there unexpected distributions? This can inform resource allocation, targeted marketing, or identifying underserved segments. For instance, a high concentration in one city might suggest a need for more localized support or expansion opportunities elsewhere.
+            * **Numeric Distributions:** Histograms and summary statistics for numeric data (e.g., 'Age', 'Salary', 'Experience') reveal the spread and central tendencies. Are salaries clustered around a certain range? Is age distribution skewed? This can help in workforce planning, compensation strategies, or identifying training needs.
+
+            **2. Spot Anomalies and Outliers:**
+            * Unusual spikes or dips in charts, or extreme min/max values in numeric summaries, could indicate data entry errors, rare events, or critical issues. Investigating these can uncover fraud, system glitches, or unique business opportunities.
+
+            **3. Assess Data Quality:**
+            * The "Missing values" count is crucial. High percentages of missing data in key columns can impact the reliability of your analysis. Consider strategies for data imputation or collecting more complete data.
+
+            **4. Formulate Hypotheses:**
+            * Based on visual patterns, start asking "why" questions. Why is one category so much larger than others? Why is there a bimodal distribution in a numeric column? These hypotheses can guide further, more targeted analysis.
+
+            **5. Drive Strategic Decisions:**
+            * **Resource Allocation:** If certain product categories are consistently popular (from categorical charts), allocate more resources to their development or marketing.
+            * **Operational Efficiency:** Identify bottlenecks or areas of inefficiency by analyzing process-related data.
+            * **Customer Understanding:** Understand customer demographics, preferences, or behavior patterns from relevant columns to tailor products or services.
+            * **Risk Management:** Detect unusual patterns that might indicate potential risks (e.g., fraud, equipment failure).
+
+            **6. Plan Further Deep Dives:**
+            * This initial analysis is exploratory. Consider more advanced techniques:
+                * **Correlation Analysis:** Explore relationships between numeric variables (e.g., using scatter plots or correlation matrices).
+                * **Segmentation:** Group your data based on certain characteristics to understand different customer segments or employee groups.
+                * **Predictive Modeling:** If you have a target variable (e.g., 'Churn', 'Sales'), you might consider building machine learning models to predict future outcomes.
+                * **Time Series Analysis:** If your data has a time component, analyze trends over time.
+
+            By systematically interpreting these initial insights, organizations can move from raw data to informed decisions, fostering continuous improvement and strategic growth.
+            """)
+        
+            st.subheader("Creating a Professional Presentation (PPT) - Manual Steps")
+            st.markdown("""
+            While you can now download an automated PPT, for more customized and polished presentations, you might still prefer to manually create one using the following steps:
+
+            1.  **Download Charts as Images:** For each chart displayed above, right-click on the chart image in your browser and select "Save Image As..." to save it as a PNG file. These high-quality images can be directly inserted into your PowerPoint slides.
+            2.  **Copy Dataset Overview:** Copy the "Dataset Overview" text directly from the Streamlit app or download it using the "Download Dataset Overview (Text)" button. This text provides a concise summary of your data's structure and characteristics, perfect for an introductory slide.
+            3.  **Utilize "Context for Organizational Development":** The "Context: Leveraging Data for Organizational Development" section provides structured bullet points and explanations. You can copy and paste these points directly into your slides, expanding on them with specific examples from your dataset.
+            4.  **Structure Your Presentation:**
+                * **Title Slide:** Your presentation title and company logo.
+                * **Introduction:** Briefly describe the dataset and its purpose.
+                * **Dataset Overview:** Use the downloaded text summary.
+                * **Key Visualizations:** Dedicate slides to each important chart, explaining what it shows and its immediate implications.
+                * **Insights & Recommendations:** Use the "Context" section to discuss trends, anomalies, and actionable strategies. Tailor these to your specific organizational goals.
+                * **Next Steps/Further Analysis:** Outline what deeper dives or additional data collection might be beneficial.
+                * **Conclusion:** Summarize key findings and call to action.
+            5.  **Design and Branding:** Apply your organization's branding, colors, and fonts to the PowerPoint template to maintain a professional and consistent look.
+            6.  **Tell a Story:** The most effective presentations tell a compelling story with data. Connect your charts and insights to a clear narrative that addresses a business question or problem.
+            """)
 
-        **5. Drive Strategic Decisions:**
-        * **Resource Allocation:** If certain product categories are consistently popular (from categorical charts), allocate more resources to their development or marketing.
-        * **Operational Efficiency:** Identify bottlenecks or areas of inefficiency by analyzing process-related data.
-        * **Customer Understanding:** Understand customer demographics, preferences, or behavior patterns from relevant columns to tailor products or services.
-        * **Risk Management:** Detect unusual patterns that might indicate potential risks (e.g., fraud, equipment failure).
+    else:
+        st.info("Please upload a CSV file to begin analysis.")
 
-        **6. Plan Further Deep Dives:**
-        * This initial analysis is exploratory. Consider more advanced techniques:
-            * **Correlation Analysis:** Explore relationships between numeric variables (e.g., using scatter plots or correlation matrices).
-            * **Segmentation:** Group your data based on certain characteristics to understand different customer segments or employee groups.
-            * **Predictive Modeling:** If you have a target variable (e.g., 'Churn', 'Sales'), you might consider building machine learning models to predict future outcomes.
-            * **Time Series Analysis:** If your data has a time component, analyze trends over time.
+    st.markdown("---")
+    st.markdown("Developed with Streamlit")
 
-        By systematically interpreting these initial insights, organizations can move from raw data to informed decisions, fostering continuous improvement and strategic growth.
-        """)
-        
-        st.subheader("Creating a Professional Presentation (PPT) - Manual Steps")
-        st.markdown("""
-        While you can now download an automated PPT, for more customized and polished presentations, you might still prefer to manually create one using the following steps:
-
-        1.  **Download Charts as Images:** For each chart displayed above, right-click on the chart image in your browser and select "Save Image As..." to save it as a PNG file. These high-quality images can be directly inserted into your PowerPoint slides.
-        2.  **Copy Dataset Overview:** Copy the "Dataset Overview" text directly from the Streamlit app or download it using the "Download Dataset Overview (Text)" button. This text provides a concise summary of your data's structure and characteristics, perfect for an introductory slide.
-        3.  **Utilize "Context for Organizational Development":** The "Context: Leveraging Data for Organizational Development" section provides structured bullet points and explanations. You can copy and paste these points directly into your slides, expanding on them with specific examples from your dataset.
-        4.  **Structure Your Presentation:**
-            * **Title Slide:** Your presentation title and company logo.
-            * **Introduction:** Briefly describe the dataset and its purpose.
-            * **Dataset Overview:** Use the downloaded text summary.
-            * **Key Visualizations:** Dedicate slides to each important chart, explaining what it shows and its immediate implications.
-            * **Insights & Recommendations:** Use the "Context" section to discuss trends, anomalies, and actionable strategies. Tailor these to your specific organizational goals.
-            * **Next Steps/Further Analysis:** Outline what deeper dives or additional data collection might be beneficial.
-            * **Conclusion:** Summarize key findings and call to action.
-        5.  **Design and Branding:** Apply your organization's branding, colors, and fonts to the PowerPoint template to maintain a professional and consistent look.
-        6.  **Tell a Story:** The most effective presentations tell a compelling story with data. Connect your charts and insights to a clear narrative that addresses a business question or problem.
-        """)
-
-else:
-    st.info("Please upload a CSV file to begin analysis.")
-
-st.markdown("---")
-st.markdown("Developed with Streamlit")
+# Chart workers import this file as __mp_main__; only a real script run starts the app
+if __name__ == "__main__":
+    main()
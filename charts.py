@@ -0,0 +1,72 @@
+import io
+import matplotlib
+matplotlib.use("Agg") # Charts are only ever rendered to PNG bytes, never to a window
+from matplotlib.figure import Figure
+import numpy as np
+
+# Set a professional style for matplotlib plots
+matplotlib.style.use('seaborn-v0_8-darkgrid') # Using a darkgrid style for a clean look
+# A colorblind-friendly and aesthetically pleasing palette
+viridis = matplotlib.colormaps['viridis']
+matplotlib.rcParams['axes.prop_cycle'] = matplotlib.cycler(color=viridis(np.linspace(0, 1, 6)))
+
+def _new_canvas():
+    # Figures are built with the object-oriented API; pyplot's global figure registry isn't
+    # thread-safe. constrained_layout solves the layout once during the draw, unlike tight_layout.
+    fig = Figure(figsize=(8, 5), constrained_layout=True) # Set a consistent figure size
+    return fig, fig.add_subplot()
+
+# Set only in pool workers, which draw one chart at a time and so can reuse one Figure for all
+# of them, clearing the Axes in between, rather than building a Figure, Axes, ticks and spines
+# per chart
+_worker_canvas = None
+
+def init_worker():
+    """Pool initializer: gives the worker process its reusable Figure."""
+    global _worker_canvas
+    _worker_canvas = _new_canvas()
+
+# Also runs in worker processes, so it lives outside the Streamlit script and must stay importable on its own
+def render_chart(kind, col_name, payload):
+    """
+    Renders the chart for a single column to PNG bytes.
+
+    Args:
+        kind: Either 'categorical' or 'numeric'.
+        col_name: The column being plotted.
+        payload: For 'categorical', the value counts ordered by frequency; for 'numeric', the
+            (density, bin edges) pair returned by numpy.histogram.
+
+    Returns:
+        A (chart title, PNG bytes) tuple.
+    """
+    if _worker_canvas is not None:
+        fig, ax = _worker_canvas
+        ax.clear()
+    else:
+        # In-process calls can come from several Streamlit session threads at once, so each
+        # gets its own Figure
+        fig, ax = _new_canvas()
+    if kind == 'categorical':
+        chart_title = f'Frequency Distribution of {col_name}'
+        # Plain matplotlib calls; seaborn's plotter setup costs more than the drawing itself
+        positions = np.arange(len(payload))
+        ax.bar(positions, payload.values, color=viridis(np.linspace(0, 1, len(payload))))
+        ax.set_xticks(positions)
+        ax.set_xticklabels(payload.index, rotation=45, ha='right') # Rotate labels for readability
+        ax.set_ylabel('Count', fontsize=12)
+    else:
+        chart_title = f'Distribution of {col_name}'
+        # Bins are precomputed, so only the bars are drawn
+        density, edges = payload
+        ax.bar(edges[:-1], density, width=np.diff(edges), align='edge')
+        ax.set_ylabel('Density', fontsize=12)
+    ax.set_title(chart_title, fontsize=14)
+    ax.set_xlabel(col_name, fontsize=12)
+
+    # A single Agg render serves both st.image and the PPT. constrained_layout already fits
+    # the labels, so bbox_inches='tight' (which costs an extra draw) isn't needed; the PNG
+    # stays a raster because python-pptx can't embed SVG
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=100)
+    return chart_title, buf.getvalue()
@@ -0,0 +1,54 @@
+import numpy as np
+from numba import njit
+
+# Layout of the rows returned by column_moments
+COUNT, MEAN, M2, MIN, MAX = range(5)
+
+# Serial on purpose: this is called from Streamlit's per-session threads, and Numba's fallback
+# workqueue threading layer aborts the process on concurrent parallel launches. Batches are
+# small enough that spreading the columns over threads gains little anyway.
+@njit(nogil=True, cache=True)
+def column_moments(values):
+    """
+    Computes count, mean, sum of squared deviations, min and max of every column
+    in a single pass over memory, skipping NaNs.
+
+    Args:
+        values: A 2D float64 array (ideally Fortran-ordered) with one column per dataset column.
+
+    Returns:
+        A (n_cols, 5) float64 array, indexed by COUNT, MEAN, M2, MIN and MAX.
+    """
+    n_rows, n_cols = values.shape
+    out = np.empty((n_cols, 5))
+    for j in range(n_cols):
+        count = 0.0
+        mean = 0.0
+        m2 = 0.0
+        lo = np.inf
+        hi = -np.inf
+        for i in range(n_rows):
+            x = values[i, j]
+            if np.isnan(x):
+                continue
+            # Welford's update keeps the variance stable without a second pass
+            count += 1.0
+            delta = x - mean
+            mean += delta / count
+            m2 += delta * (x - mean)
+            if x < lo:
+                lo = x
+            if x > hi:
+                hi = x
+        out[j, COUNT] = count
+        out[j, MEAN] = mean
+        out[j, M2] = m2
+        out[j, MIN] = lo
+        out[j, MAX] = hi
+    return out
+
+# Compile (or load from the on-disk cache) at import so the first upload doesn't pay for the JIT.
+# Batches with one numeric column arrive C-contiguous and wider ones Fortran-ordered, so both
+# layouts are warmed up.
+column_moments(np.zeros((1, 1)))
+column_moments(np.zeros((1, 2), order='F'))
@@ -0,0 +1,166 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    # Make the test files span many Arrow blocks without writing megabytes of CSV
+    monkeypatch.setattr(app, "CSV_BLOCK_SIZE", 1 << 10)
+
+
+def _csv_bytes(rows):
+    return ("a,b\n" + "".join(f"{a},{b}\n" for a, b in rows)).encode("utf-8")
+
+
+def test_text_after_first_block_in_numeric_column(small_blocks):
+    data = _csv_bytes([(i, "x") for i in range(2000)] + [("oops", "x")])
+    assert len(data) > app.CSV_BLOCK_SIZE
+
+    result = app.analyze_csv_data(io.BytesIO(data))
+
+    assert "error" not in result
+    info = result["column_info"].loc["a"]
+    # 2000 of the 2001 values are numeric, so the column stays numeric
+    assert info["type"] == "numeric"
+    assert info["count"] == 2000
+    assert info["min"] == 0
+    assert info["max"] == 1999
+
+
+def test_column_empty_in_first_block(small_blocks):
+    data = _csv_bytes([(i, "") for i in range(2000)] + [(2000, "late")])
+    assert len(data) > app.CSV_BLOCK_SIZE
+
+    result = app.analyze_csv_data(io.BytesIO(data))
+
+    assert "error" not in result
+    info = result["column_info"].loc["b"]
+    assert info["type"] == "categorical"
+    assert info["unique_values"] == 1
+    assert info["missing_count"] == 2000
+    assert result["column_info"].loc["a", "count"] == 2001
+
+
+def test_quoted_field_spanning_lines():
+    data = b'a,note\n1,"first line\nsecond line"\n2,plain\n'
+
+    result = app.analyze_csv_data(io.BytesIO(data))
+
+    assert "error" not in result
+    assert result["summary"].startswith("The dataset contains 2 rows and 2 columns.")
+    assert result["dataframe"].loc[0, "note"] == "first line\nsecond line"
+
+
+def test_blank_and_repeated_header_names_are_renamed_like_pandas():
+    data = b"a,a,,a.1,a\n1,x,2,y,3\n"
+
+    result = app.analyze_csv_data(io.BytesIO(data))
+
+    assert "error" not in result
+    expected = ["a", "a.1", "Unnamed: 2", "a.1.1", "a.2"]
+    assert list(result["column_info"].index) == expected
+    assert list(result["dataframe"].columns) == expected
+    assert result["column_info"].loc["a.2", "max"] == 3
+
+
+def test_float_after_first_block_in_integer_column(small_blocks):
+    data = _csv_bytes([(i, "x") for i in range(2000)] + [(2000.5, "x")])
+    assert len(data) > app.CSV_BLOCK_SIZE
+
+    result = app.analyze_csv_data(io.BytesIO(data))
+
+    assert "error" not in result
+    info = result["column_info"].loc["a"]
+    assert info["type"] == "numeric"
+    assert info["count"] == 2001
+    assert info["max"] == 2000.5
+    # Widened to float64 rather than read as text
+    assert result["dataframe"]["a"].dtype == "float64"
+
+
+def test_batch_merged_moments_match_pandas(small_blocks):
+    rng = np.random.default_rng(1)
+    data = _csv_bytes(zip(rng.normal(100, 15, 3000).round(3), rng.exponential(2, 3000).round(3)))
+    assert len(data) > 10 * app.CSV_BLOCK_SIZE
+
+    result = app.analyze_csv_data(io.BytesIO(data))
+
+    expected = pd.read_csv(io.BytesIO(data)).describe()
+    for col_name in ("a", "b"):
+        info = result["column_info"].loc[col_name]
+        assert info["count"] == expected.loc["count", col_name]
+        assert info["mean"] == pytest.approx(expected.loc["mean", col_name])
+        assert info["std"] == pytest.approx(expected.loc["std", col_name])
+        assert info["min"] == expected.loc["min", col_name]
+        assert info["max"] == expected.loc["max", col_name]
+        assert info["median"] == pytest.approx(expected.loc["50%", col_name])
+
+
+def test_reservoir_update_keeps_size_and_draws_from_the_stream():
+    rng = np.random.default_rng(0)
+    sample = pd.DataFrame({"row": np.arange(50)})
+    rows_seen = 50
+    for start in range(50, 5000, 250):
+        chunk = pd.DataFrame({"row": np.arange(start, start + 250)})
+        sample = app._reservoir_update(sample, chunk, rows_seen, rng)
+        rows_seen += len(chunk)
+
+    assert len(sample) == 50
+    assert sample["row"].is_unique
+    assert sample["row"].between(0, rows_seen - 1).all()
+    # A uniform sample of 5000 rows keeps almost nothing from the first 50
+    assert (sample["row"] >= 50).sum() > 40
+
+
+def test_unique_value_cap_is_marked_in_summary(monkeypatch):
+    monkeypatch.setattr(app, "MAX_TRACKED_UNIQUES", 5)
+    data = _csv_bytes([(f"v{i}", f"w{i % 5}") for i in range(20)])
+
+    result = app.analyze_csv_data(io.BytesIO(data))
+
+    stats = result["column_info"]
+    assert bool(stats.loc["a", "unique_values_capped"])
+    assert not bool(stats.loc["b", "unique_values_capped"])
+    assert stats.loc["b", "unique_values"] == 5
+    rows = {line.split()[0]: line.split() for line in result["summary"].splitlines()[4:]}
+    assert ">5" in rows["a"]
+    assert "5" in rows["b"] and ">5" not in rows["b"]
+
+
+def test_infinite_values_are_left_out_of_the_histogram():
+    data = _csv_bytes([(i, "x") for i in range(20)] + [("inf", "x"), ("-Infinity", "x")])
+
+    result = app.analyze_csv_data(io.BytesIO(data))
+
+    assert "error" not in result
+    density, edges = result["histograms"]["a"]
+    assert np.isfinite(edges).all()
+    assert edges[0] == 0 and edges[-1] == 19
+
+
+def test_large_files_are_sampled_for_plotting(small_blocks, monkeypatch):
+    monkeypatch.setattr(app, "MAX_PLOT_ROWS", 100)
+    data = _csv_bytes([(i, "x") for i in range(2000)])
+
+    result = app.analyze_csv_data(io.BytesIO(data))
+
+    assert result["is_sampled"]
+    assert len(result["dataframe"]) == 100
+    # Streamed statistics still cover every row
+    assert result["column_info"].loc["a", "count"] == 2000
+    assert result["column_info"].loc["a", "max"] == 1999
+    assert "Medians are estimated from a random sample of 100 rows" in result["summary"]
+
+
+def test_small_files_are_kept_whole(small_blocks):
+    data = _csv_bytes([(i, "x") for i in range(2000)])
+
+    result = app.analyze_csv_data(io.BytesIO(data))
+
+    assert not result["is_sampled"]
+    assert len(result["dataframe"]) == 2000